@@ -0,0 +1,333 @@
+"""Time the pipeline stages on a synthetic exam archive.
+
+Run with `python -m benchmarks.run_benchmarks`. Results are saved as JSON so two runs
+can be compared with `--compare previous.json`.
+"""
+import argparse
+import contextlib
+import csv
+import io
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")  # The OpenAI client is created on import
+
+import fitz
+from src import exam_solver
+from src.config import NIVELES, FASE, CURR_YEAR, EXAMS_DIR, SOLUTIONS_DIR, ANSWERS_DIR
+from src.exam_solver import get_pdf_page, clean_response_to_json, get_year_answers, merge_answers
+from src.generate_statistics import generate_statistics
+from src.analytics import analyze_runs
+from src.solution_reader import get_solutions_csv
+from benchmarks.synthetic_exams import generate_archive, LETTERS
+
+RESULTS_DIR = os.path.join("benchmarks", "results")
+ARCHIVE_YEARS = list(range(2002, CURR_YEAR))
+RENDER_STAGES = ["get_pdf_page", "get_solutions_csv", "get_year_answers", "get_year_answers_stream"]
+ERROR_RATE = 0.3  # Fraction of wrong answers returned by the fake model
+ANSWER_FIELDNAMES = ['question_number', 'nivel1', 'nivel2', 'nivel3', 'nivel4', 'fase', 'anio',
+                     'image_width', 'image_height', 'page_number', 'prompt_tokens', 'completion_tokens',
+                     'time_to_first_answer_nivel1', 'time_to_first_answer_nivel2',
+                     'time_to_first_answer_nivel3', 'time_to_first_answer_nivel4']
+SOLUTION_FIELDNAMES = ['question_number', 'nivel1', 'nivel2', 'nivel3', 'nivel4', 'fase', 'anio']
+
+
+class FakeModelBackend:
+    """Stand-in for the OpenAI client that replays canned page responses in order."""
+
+    def __init__(self, responses, chunk_size=3):
+        self.responses = responses
+        self.chunk_size = chunk_size
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, messages, max_tokens, stream=False, **kwargs):
+        content = self.responses[self.calls % len(self.responses)]
+        self.calls += 1
+        usage = SimpleNamespace(prompt_tokens=1105, completion_tokens=len(content) // 3 + 1)
+        if stream:
+            return FakeStream(content, usage, self.chunk_size)
+        message = SimpleNamespace(content=content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+
+class FakeStream:
+    """Yields the response in small chunks like a streamed chat completion."""
+
+    def __init__(self, content, usage, chunk_size=3):
+        self.content = content
+        self.usage = usage
+        self.chunk_size = chunk_size
+
+    def __iter__(self):
+        for i in range(0, len(self.content), self.chunk_size):
+            delta = SimpleNamespace(content=self.content[i:i + self.chunk_size])
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)], usage=None)
+        yield SimpleNamespace(choices=[], usage=self.usage)
+
+    def close(self):
+        pass
+
+
+def model_responses(layouts, solutions, rng):
+    """Build the page responses in the order get_year_answers requests them."""
+    responses = []
+    for year in sorted(layouts):
+        for nivel in NIVELES:
+            for page_questions in layouts[year][nivel]:
+                if not page_questions:
+                    responses.append("None")
+                    continue
+                answers = []
+                for q in page_questions:
+                    answer = solutions[year][nivel][str(q)]
+                    if rng.random() < ERROR_RATE:
+                        answer = rng.choice(LETTERS)
+                    answers.append(f"{q}: {answer}")
+                responses.append("{" + ", ".join(answers) + "}")
+    return responses
+
+
+def write_csv(path, fieldnames, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def synthetic_rows(year, questions, rng, key=None):
+    """Rows for one year; answers follow key with ERROR_RATE mistakes, or are random without a key."""
+    rows = []
+    for q in range(1, questions + 1):
+        row = {'question_number': str(q), 'fase': str(FASE), 'anio': str(year)}
+        for nivel in NIVELES:
+            answer = key[nivel][str(q)] if key else rng.choice(LETTERS)
+            if key and rng.random() < ERROR_RATE:
+                answer = rng.choice(LETTERS)
+            row[nivel] = answer
+        rows.append(row)
+    return rows
+
+
+def timed(func, items):
+    """Run func with its output silenced and return (seconds, items)."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        func()
+        seconds = time.perf_counter() - start
+    return seconds, items
+
+
+def bench_get_pdf_page(archive, scale):
+    pages = [(path, page) for path, page_count in archive['exams'] for page in range(page_count)]
+    def run():
+        for _ in range(scale):
+            for path, page in pages:
+                get_pdf_page(path, page)
+    return timed(run, len(pages) * scale)
+
+
+def bench_get_solutions_csv(archive, scale):
+    def run():
+        for _ in range(scale):
+            for path in archive['solutions']:
+                get_solutions_csv(path)
+    return timed(run, len(archive['solutions']) * scale)
+
+
+def bench_get_year_answers(archive, scale):
+    exam_solver.client = FakeModelBackend(archive['responses'])
+    def run():
+        for _ in range(scale):
+            for year in archive['years']:
+                get_year_answers(year)
+    return timed(run, len(archive['years']) * scale)
+
+
+def bench_get_year_answers_stream(archive, scale):
+    stream_answers = exam_solver.STREAM_ANSWERS
+    exam_solver.STREAM_ANSWERS = True
+    try:
+        return bench_get_year_answers(archive, scale)
+    finally:
+        exam_solver.STREAM_ANSWERS = stream_answers
+
+
+def bench_clean_response_to_json(archive, scale):
+    responses = [r for r in archive['responses'] if r != "None"] * scale
+    def run():
+        for response in responses:
+            clean_response_to_json(response)
+    return timed(run, len(responses))
+
+
+def bench_merge_answers(archive, scale):
+    # merge_answers reads respuestas_{year}.csv for the years before CURR_YEAR, so scale the rows per year
+    rng = random.Random(scale)
+    questions = 25 * scale
+    years = [year for year in archive['years'] if year < CURR_YEAR]
+    os.makedirs(ANSWERS_DIR, exist_ok=True)
+    for year in years:
+        write_csv(os.path.join(ANSWERS_DIR, f"respuestas_{year}.csv"), ANSWER_FIELDNAMES,
+                  synthetic_rows(year, questions, rng))
+    return timed(merge_answers, len(years) * questions)
+
+
+def bench_generate_statistics(archive, scale):
+    # Statistics are grouped by year, so scale the number of (synthetic) years
+    rng = random.Random(scale)
+    years = range(2002, 2002 + len(archive['years']) * scale)
+    answers, solutions = [], []
+    for year in years:
+        year_solutions = synthetic_rows(year, 25, rng)
+        key = {nivel: {row['question_number']: row[nivel] for row in year_solutions} for nivel in NIVELES}
+        solutions.extend(year_solutions)
+        answers.extend(synthetic_rows(year, 25, rng, key=key))
+    answers_csv = os.path.join(ANSWERS_DIR, f"bench_respuestas_{scale}.csv")
+    solutions_csv = os.path.join(SOLUTIONS_DIR, f"bench_soluciones_{scale}.csv")
+    os.makedirs(ANSWERS_DIR, exist_ok=True)
+    write_csv(answers_csv, ANSWER_FIELDNAMES, answers)
+    write_csv(solutions_csv, SOLUTION_FIELDNAMES, solutions)
+    return timed(lambda: generate_statistics(answers_csv, solutions_csv), len(answers))
+
+
+def bench_analyze_runs(archive, scale):
+    # Compare 10 runs per scale step over the whole archive
+    rng = random.Random(scale)
+    solutions, key = [], {}
+    for year in archive['years']:
+        year_solutions = synthetic_rows(year, 25, rng)
+        key[year] = {nivel: {row['question_number']: row[nivel] for row in year_solutions} for nivel in NIVELES}
+        solutions.extend(year_solutions)
+    solutions_csv = os.path.join(SOLUTIONS_DIR, f"bench_soluciones_runs_{scale}.csv")
+    write_csv(solutions_csv, SOLUTION_FIELDNAMES, solutions)
+
+    runs_dir = os.path.join(ANSWERS_DIR, f"runs_{scale}")
+    os.makedirs(runs_dir, exist_ok=True)
+    answer_csvs = []
+    for run in range(10 * scale):
+        rows = []
+        for year in archive['years']:
+            rows.extend(synthetic_rows(year, 25, rng, key=key[year]))
+        answer_csvs.append(os.path.join(runs_dir, f"respuestas_{run}.csv"))
+        write_csv(answer_csvs[-1], ANSWER_FIELDNAMES, rows)
+    return timed(lambda: analyze_runs(answer_csvs, solutions_csv, os.path.join(runs_dir, "analytics")), len(answer_csvs))
+
+
+BENCHMARKS = {
+    "get_pdf_page": bench_get_pdf_page,
+    "get_solutions_csv": bench_get_solutions_csv,
+    "get_year_answers": bench_get_year_answers,
+    "get_year_answers_stream": bench_get_year_answers_stream,
+    "clean_response_to_json": bench_clean_response_to_json,
+    "merge_answers": bench_merge_answers,
+    "generate_statistics": bench_generate_statistics,
+    "analyze_runs": bench_analyze_runs,
+}
+
+
+def build_archive(years, seed):
+    """Generate the synthetic PDFs in the current directory."""
+    layouts, solutions = generate_archive(".", years, seed=seed)
+    exams = []
+    for year in years:
+        for nivel in NIVELES:
+            exams.append((os.path.join(EXAMS_DIR, str(year), f"{nivel}_fase{FASE}.pdf"), len(layouts[year][nivel])))
+    return {
+        'years': years,
+        'exams': exams,
+        'solutions': [os.path.join(SOLUTIONS_DIR, str(year), f"soluciones_fase{FASE}.pdf") for year in years],
+        'responses': model_responses(layouts, solutions, random.Random(seed)),
+    }
+
+
+def run_benchmarks(stages, scales, render_scales, years, repeat=1, seed=0):
+    results = []
+    original_client = exam_solver.client
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            archive = build_archive(years, seed)
+            for stage in stages:
+                for scale in (render_scales if stage in RENDER_STAGES else scales):
+                    # Keep the fastest of the repeats to reduce noise
+                    seconds, items = min(BENCHMARKS[stage](archive, scale) for _ in range(repeat))
+                    results.append({
+                        'stage': stage,
+                        'scale': scale,
+                        'items': items,
+                        'seconds': round(seconds, 6),
+                        'items_per_second': round(items / seconds, 2) if seconds else None,
+                    })
+                    print(f"{stage:<24} {scale:>4}x {items:>8} items {seconds:>10.3f}s")
+        finally:
+            os.chdir(cwd)
+            exam_solver.client = original_client
+
+    return {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pymupdf': fitz.VersionBind,
+        'archive_years': len(years),
+        'archive_pages': sum(page_count for _, page_count in archive['exams']),
+        'results': results,
+    }
+
+
+def compare_results(previous, current):
+    """Print the time ratio current/previous for every stage and scale present in both runs."""
+    previous_times = {(r['stage'], r['scale']): r['seconds'] for r in previous['results']}
+    print(f"\nComparison with run from {previous['created']} (ratio > 1 is slower)")
+    for r in current['results']:
+        before = previous_times.get((r['stage'], r['scale']))
+        if before:
+            print(f"{r['stage']:<24} {r['scale']:>4}x {before:>10.3f}s -> {r['seconds']:>10.3f}s  {r['seconds'] / before:.2f}x")
+
+
+def parse_scales(value):
+    return [int(scale) for scale in value.split(",")]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the GPT-Primavera pipeline on synthetic exams.")
+    parser.add_argument("--stages", default=",".join(BENCHMARKS), help="Comma separated stages to run")
+    parser.add_argument("--scales", type=parse_scales, default=[1, 10, 100],
+                        help="Scales for the CSV and parsing stages (default: 1,10,100)")
+    parser.add_argument("--render-scales", type=parse_scales, default=[1],
+                        help="Scales for the stages that render PDF pages, about 0.2s per page (default: 1)")
+    parser.add_argument("--years", type=int, default=len(ARCHIVE_YEARS), help="Years in the synthetic archive")
+    parser.add_argument("--repeat", type=int, default=1, help="Repeat each benchmark and keep the fastest")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="JSON output path (default: benchmarks/results/benchmark_<timestamp>.json)")
+    parser.add_argument("--compare", help="Previous JSON results to compare against")
+    args = parser.parse_args(argv)
+
+    stages = args.stages.split(",")
+    unknown = [stage for stage in stages if stage not in BENCHMARKS]
+    if unknown:
+        parser.error(f"Unknown stages: {', '.join(unknown)}")
+
+    years = list(range(2002, 2002 + args.years))
+    report = run_benchmarks(stages, args.scales, args.render_scales, years, repeat=args.repeat, seed=args.seed)
+
+    output_path = args.output or os.path.join(RESULTS_DIR, f"benchmark_{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults saved to {output_path}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare_results(json.load(f), report)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""Synthetic Primavera-style exam and solution PDFs used by the benchmarks."""
+import os
+import random
+import fitz
+from src.config import NIVELES, FASE, EXAMS_DIR, SOLUTIONS_DIR
+
+QUESTIONS_PER_EXAM = 25
+LETTERS = "ABCDE"
+NIVEL_NAMES = ["Nivel I", "Nivel II", "Nivel III", "Nivel IV"]
+PAGE_WIDTH, PAGE_HEIGHT = fitz.paper_size("a4")
+MARGIN = 50
+SINGLE_COLUMN_QUESTIONS = 9  # Questions per page
+DOUBLE_COLUMN_QUESTIONS = 7  # Questions per column
+
+QUESTION_TEMPLATES = [
+    "¿Cuántos números de {n} cifras tienen todas sus cifras distintas y suman {m}?",
+    "En un triángulo isósceles el ángulo desigual mide {n} grados. ¿Cuánto mide cada uno de los otros dos?",
+    "Ana tiene {n} cromos y regala la tercera parte a su hermano y {m} a su prima. ¿Cuántos le quedan?",
+    "¿Cuál es el menor múltiplo de {n} que al dividirlo entre {m} da resto 1?",
+    "Un cuadrado de lado {n} cm se divide en {m} rectángulos iguales. ¿Cuál es el perímetro de cada uno?",
+    "Si hoy es lunes, ¿qué día de la semana será dentro de {n}{m} días?",
+]
+
+def make_solutions(rng):
+    """Return a random answer key: nivel -> question number -> letter."""
+    return {nivel: {str(q): rng.choice(LETTERS) for q in range(1, QUESTIONS_PER_EXAM + 1)}
+            for nivel in NIVELES}
+
+def question_text(rng, question_num):
+    text = rng.choice(QUESTION_TEMPLATES).format(n=rng.randint(2, 9), m=rng.randint(2, 9))
+    options = "   ".join(f"{letter}) {rng.randint(10, 99)}" for letter in LETTERS)
+    return f"{question_num}. {text}\n{options}"
+
+def write_exam_pdf(path, year, nivel_name, rng, double_column=False):
+    """Write a 25 question exam followed by an answer sheet page without questions.
+
+    Returns the question numbers printed on each page, e.g. [[1, ..., 9], [10, ...], []].
+    """
+    doc = fitz.open()
+    per_page = 2 * DOUBLE_COLUMN_QUESTIONS if double_column else SINGLE_COLUMN_QUESTIONS
+    columns = 2 if double_column else 1
+    column_width = (PAGE_WIDTH - 2 * MARGIN - 20 * (columns - 1)) / columns
+    block_height = (PAGE_HEIGHT - 2 * MARGIN - 40) / (per_page // columns)
+    layout = []
+
+    questions = list(range(1, QUESTIONS_PER_EXAM + 1))
+    for start in range(0, len(questions), per_page):
+        page = doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+        page.insert_text((MARGIN, MARGIN), f"Concurso Primavera de Matemáticas {year} - {nivel_name} - Fase {FASE}", fontsize=12)
+        page_questions = questions[start:start + per_page]
+        for i, question_num in enumerate(page_questions):
+            column, row = divmod(i, per_page // columns)
+            x0 = MARGIN + column * (column_width + 20)
+            y0 = MARGIN + 40 + row * block_height
+            rect = fitz.Rect(x0, y0, x0 + column_width, y0 + block_height - 5)
+            page.insert_textbox(rect, question_text(rng, question_num), fontsize=10)
+        layout.append(page_questions)
+
+    page = doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+    page.insert_text((MARGIN, MARGIN), "Hoja de respuestas", fontsize=12)
+    layout.append([])
+
+    doc.save(path)
+    doc.close()
+    return layout
+
+def write_solutions_pdf(path, year, solutions):
+    """Write the solutions table: a header row with Nivel I-IV and one row per question."""
+    doc = fitz.open()
+    page = doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+    page.insert_text((MARGIN, MARGIN), f"Soluciones Concurso Primavera {year} - Fase {FASE}", fontsize=12)
+
+    header = []
+    for nivel_name in NIVEL_NAMES:
+        header.extend([nivel_name, ""])
+    rows = [header]
+    for q in range(1, QUESTIONS_PER_EXAM + 1):
+        row = []
+        for nivel in NIVELES:
+            row.extend([str(q), solutions[nivel][str(q)]])
+        rows.append(row)
+
+    cell_width = (PAGE_WIDTH - 2 * MARGIN) / 8
+    cell_height = 24
+    for r, row in enumerate(rows):
+        for c, value in enumerate(row):
+            x0 = MARGIN + c * cell_width
+            y0 = MARGIN + 20 + r * cell_height
+            cell = fitz.Rect(x0, y0, x0 + cell_width, y0 + cell_height)
+            page.draw_rect(cell, color=(0, 0, 0), width=0.5)
+            if value:
+                page.insert_text((x0 + 4, y0 + 16), value, fontsize=10)
+
+    doc.save(path)
+    doc.close()
+
+def generate_archive(root, years, seed=0):
+    """Generate exams and solutions for the given years under root.
+
+    Even years use single column exams and odd years double column ones.
+    Returns (layouts, solutions) keyed by year and nivel.
+    """
+    rng = random.Random(seed)
+    layouts = {}
+    solutions = {}
+    for year in years:
+        exams_dir = os.path.join(root, EXAMS_DIR, str(year))
+        solutions_dir = os.path.join(root, SOLUTIONS_DIR, str(year))
+        os.makedirs(exams_dir, exist_ok=True)
+        os.makedirs(solutions_dir, exist_ok=True)
+
+        solutions[year] = make_solutions(rng)
+        layouts[year] = {}
+        for nivel, nivel_name in zip(NIVELES, NIVEL_NAMES):
+            pdf_path = os.path.join(exams_dir, f"{nivel}_fase{FASE}.pdf")
+            layouts[year][nivel] = write_exam_pdf(pdf_path, year, nivel_name, rng, double_column=year % 2 == 1)
+        write_solutions_pdf(os.path.join(solutions_dir, f"soluciones_fase{FASE}.pdf"), year, solutions[year])
+    return layouts, solutions
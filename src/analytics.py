@@ -0,0 +1,196 @@
+import os
+import csv
+import json
+import argparse
+import numpy as np
+from src.config import STATISTICS_DIR, SOLUTIONS_DIR, NIVELES
+
+LETTERS = "ABCDE"
+LETTER_CODES = {letter: code for code, letter in enumerate(LETTERS)}
+MISSING = -1
+INVALID = len(LETTERS)  # Non-empty answer that is not a letter, e.g. None or ?
+
+def encode_answer(value):
+    """Map A-E to 0-4, empty values to MISSING and any other value to INVALID.
+
+    Values are compared as they are in the CSV, like calculate_accuracy does, so an
+    INVALID answer counts as wrong.
+    """
+    if not value:
+        return MISSING
+    return LETTER_CODES.get(value, INVALID)
+
+def load_runs(answer_csvs, solutions_csv, run_names=None):
+    """Load N answer runs and the solutions into one array indexed by (anio, nivel, question).
+
+    The index is built from the questions in the solutions file. Returns a dict with
+    'runs' (names), 'keys' (anio, nivel, question_number), 'solutions' with shape (Q,)
+    and 'answers' with shape (N, Q), both holding codes from encode_answer.
+    Raises ValueError if two runs have the same name.
+    """
+    if run_names is None:
+        run_names = [os.path.splitext(path)[0] for path in answer_csvs]
+    run_names = list(run_names)
+    duplicates = sorted({name for name in run_names if run_names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"Duplicate run names: {', '.join(duplicates)}")
+
+    keys = []
+    solutions = []
+    with open(solutions_csv, 'r', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            for nivel in NIVELES:
+                keys.append((row['anio'], nivel, row['question_number']))
+                solutions.append(encode_answer(row[nivel]))
+    positions = {key: i for i, key in enumerate(keys)}
+
+    answers = np.full((len(answer_csvs), len(keys)), MISSING, dtype=np.int8)
+    for run, answers_csv in enumerate(answer_csvs):
+        with open(answers_csv, 'r', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                for nivel in NIVELES:
+                    position = positions.get((row['anio'], nivel, row['question_number']))
+                    if position is not None:
+                        answers[run, position] = encode_answer(row[nivel])
+
+    return {
+        'runs': run_names,
+        'keys': keys,
+        'solutions': np.array(solutions, dtype=np.int8),
+        'answers': answers,
+    }
+
+def _valid_and_correct(data):
+    valid = (data['answers'] != MISSING) & (data['solutions'] != MISSING)
+    # An INVALID solution never matches, even an INVALID answer
+    correct = valid & (data['answers'] == data['solutions']) & (data['solutions'] != INVALID)
+    return valid, correct
+
+def _percent(numerator, denominator):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator > 0, numerator / denominator * 100, np.nan)
+
+def accuracy_matrix(data, group_by=('anio', 'nivel')):
+    """Accuracy (%) of every run for every group of questions, shape (N, groups).
+
+    Questions without an answer or a solution are ignored and any other value that
+    differs from the solution is wrong, as in calculate_accuracy.
+    Returns (groups, matrix); groups with no valid pairs are NaN.
+    """
+    fields = {'anio': 0, 'nivel': 1, 'question_number': 2}
+    group_keys = [tuple(key[fields[field]] for field in group_by) for key in data['keys']]
+    groups = sorted(set(group_keys))
+    group_index = {group: i for i, group in enumerate(groups)}
+    membership = np.zeros((len(group_keys), len(groups)), dtype=np.float32)
+    membership[np.arange(len(group_keys)), [group_index[g] for g in group_keys]] = 1
+
+    valid, correct = _valid_and_correct(data)
+    return groups, _percent(correct.astype(np.float32) @ membership, valid.astype(np.float32) @ membership)
+
+def run_accuracy(data):
+    """Overall accuracy (%) of each run, shape (N,)."""
+    valid, correct = _valid_and_correct(data)
+    return _percent(correct.sum(axis=1), valid.sum(axis=1))
+
+def question_difficulty(data):
+    """Percentage of runs that got each question wrong, shape (Q,). NaN if no run answered it."""
+    valid, correct = _valid_and_correct(data)
+    return _percent((valid & ~correct).sum(axis=0), valid.sum(axis=0))
+
+def confusion_matrices(data):
+    """Counts of solution letter (rows) vs answer (columns: A-E, then INVALID) per run, shape (N, 5, 6)."""
+    valid, _ = _valid_and_correct(data)
+    valid &= data['solutions'] != INVALID
+    runs, questions = np.nonzero(valid)
+    n_letters = len(LETTERS)
+    n_answers = n_letters + 1
+    cells = (runs * n_letters + data['solutions'][questions]) * n_answers + data['answers'][runs, questions]
+    counts = np.bincount(cells, minlength=len(data['runs']) * n_letters * n_answers)
+    return counts.reshape(len(data['runs']), n_letters, n_answers)
+
+def run_agreement(data):
+    """Percentage of questions answered with a letter by both runs where they gave the same one, shape (N, N).
+
+    MISSING and INVALID answers are left out, so a run always agrees 100% with itself.
+    """
+    answered = (data['answers'] != MISSING) & (data['answers'] != INVALID)
+    one_hot = (data['answers'][:, :, None] == np.arange(len(LETTERS))).reshape(len(data['runs']), -1)
+    one_hot = one_hot.astype(np.float32)
+    answered = answered.astype(np.float32)
+    return _percent(one_hot @ one_hot.T, answered @ answered.T)
+
+def _json_values(array):
+    return [None if np.isnan(v) else round(float(v), 4) for v in array]
+
+def export_analytics(data, output_dir=os.path.join(STATISTICS_DIR, "analytics")):
+    """Write all the analytics as analytics.json plus one CSV per table. All rates are percentages."""
+    os.makedirs(output_dir, exist_ok=True)
+    groups, accuracy = accuracy_matrix(data)
+    group_names = [f"{anio}_{nivel}" for anio, nivel in groups]
+    nivel_groups, nivel_accuracy = accuracy_matrix(data, group_by=('nivel',))
+    overall = run_accuracy(data)
+    difficulty = question_difficulty(data)
+    confusion = confusion_matrices(data)
+    agreement = run_agreement(data)
+
+    report = {
+        'runs': data['runs'],
+        'accuracy_pct': {run: value for run, value in zip(data['runs'], _json_values(overall))},
+        'accuracy_by_nivel_pct': {
+            run: dict(zip([nivel for (nivel,) in nivel_groups], _json_values(row)))
+            for run, row in zip(data['runs'], nivel_accuracy)
+        },
+        'accuracy_matrix_pct': {
+            'groups': group_names,
+            'values': {run: _json_values(row) for run, row in zip(data['runs'], accuracy)},
+        },
+        'question_difficulty': [
+            {'anio': anio, 'nivel': nivel, 'question_number': q, 'difficulty_pct': value}
+            for (anio, nivel, q), value in zip(data['keys'], _json_values(difficulty))
+        ],
+        'confusion_matrix': {
+            'solutions': list(LETTERS),
+            'answers': list(LETTERS) + ['invalid'],
+            'total': confusion.sum(axis=0).tolist(),
+            'by_run': {run: matrix.tolist() for run, matrix in zip(data['runs'], confusion)},
+        },
+        'run_agreement_pct': {run: _json_values(row) for run, row in zip(data['runs'], agreement)},
+    }
+    with open(os.path.join(output_dir, "analytics.json"), 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+    tables = {
+        "accuracy_matrix.csv": (['run', 'accuracy_pct'] + [f"{name}_pct" for name in group_names],
+                                [[run, overall[i]] + list(accuracy[i]) for i, run in enumerate(data['runs'])]),
+        "question_difficulty.csv": (['anio', 'nivel', 'question_number', 'difficulty_pct'],
+                                    [list(key) + [value] for key, value in zip(data['keys'], difficulty)]),
+        "confusion_matrix.csv": (['solution'] + list(LETTERS) + ['invalid'],
+                                 [[letter] + row for letter, row in zip(LETTERS, confusion.sum(axis=0).tolist())]),
+        "run_agreement.csv": (['run_agreement_pct'] + data['runs'],
+                              [[run] + list(row) for run, row in zip(data['runs'], agreement)]),
+    }
+    for filename, (header, rows) in tables.items():
+        with open(os.path.join(output_dir, filename), 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            writer.writerows([[_format_cell(value) for value in row] for row in rows])
+
+    print(f"Analytics for {len(data['runs'])} runs have been saved to {output_dir}")
+    return output_dir
+
+def _format_cell(value):
+    if isinstance(value, (float, np.floating)):
+        return "" if np.isnan(value) else f"{value:.4f}"
+    return value
+
+def analyze_runs(answer_csvs, solutions_csv, output_dir=os.path.join(STATISTICS_DIR, "analytics")):
+    data = load_runs(answer_csvs, solutions_csv)
+    return export_analytics(data, output_dir)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare several answer runs against the solutions.")
+    parser.add_argument("answers", nargs="+", help="Answer CSV files, one per run")
+    parser.add_argument("--solutions", default=os.path.join(SOLUTIONS_DIR, "soluciones_all.csv"))
+    parser.add_argument("--output", default=os.path.join(STATISTICS_DIR, "analytics"))
+    args = parser.parse_args()
+    analyze_runs(args.answers, args.solutions, args.output)
@@ -9,6 +9,7 @@ STATISTICS_DIR = "estadisticas"
 ANSWERS_DIR = "respuestas"
 MODEL="gpt-4o-2024-08-06"
 PRINT_FLAG = True
+STREAM_ANSWERS = False
 TEST_PATHS = [
     r"examenes\2002\nivel4_fase2.pdf", # Double column page
     r"examenes\2002\nivel3_fase2.pdf"
@@ -7,37 +7,157 @@ import csv
 import os
 import json
 import re
-from src.config import CURR_YEAR, TEST_PATHS, OPENAI_API_KEY, SOLUTIONS_DIR, ANSWERS_DIR, NIVELES, EXAMS_DIR, MODEL
+import time
+from src.config import CURR_YEAR, TEST_PATHS, OPENAI_API_KEY, SOLUTIONS_DIR, ANSWERS_DIR, NIVELES, EXAMS_DIR, MODEL, STREAM_ANSWERS
 from openai import OpenAI
 
 client = OpenAI(api_key=OPENAI_API_KEY)
 
+ANSWER_PATTERN = re.compile(r'["\']?(\d+)["\']?\s*:\s*["\']?([A-Ea-e])["\']?\s*[,}]')
+LAST_ANSWER_PATTERN = re.compile(r'["\']?(\d+)["\']?\s*:\s*["\']?([A-Ea-e])["\']?\s*$')
+QUESTION_NUMBER_PATTERN = re.compile(r'^\s*(\d{1,2})\s*[.)-]', re.MULTILINE)
+
+def build_page_messages(base64_image):
+    return [
+        {
+            "role": "user",
+            "content": [
+                {"type": "text", "text": "Return a dictionary question number -> answer (A, B, C, D, E) for each question in the image, nothing else, no formatting, no quotation marks. e.g:{1: B, 2: B, 3: C}. If there are no questions in the image, return None."},
+                {
+                    "type": "image_url",
+                    "image_url": {
+                        "url": f"data:image/png;base64,{base64_image}",
+                        "detail": "high"
+                    },
+                },
+            ],
+        }
+    ]
+
 def process_pdf_page(pdf_path, page_number):
     try:
         base64_image = get_pdf_page(pdf_path, page_number)
         response = client.chat.completions.create(
             model=MODEL,
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": "Return a dictionary question number -> answer (A, B, C, D, E) for each question in the image, nothing else, no formatting, no quotation marks. e.g:{1: B, 2: B, 3: C}. If there are no questions in the image, return None."},
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/png;base64,{base64_image}",
-                                "detail": "high"
-                            },
-                        },
-                    ],
-                }
-            ],
+            messages=build_page_messages(base64_image),
             max_tokens=300,
         )
         return response.choices[0].message.content, response.usage.prompt_tokens, response.usage.completion_tokens
     except Exception as e:
         print(f"Error: {str(e)}")
         return None, 0, 0
+
+def get_page_question_numbers(pdf_path, page_number):
+    """Return the question numbers printed on a page, read from the PDF text layer."""
+    pdf_document = fitz.open(pdf_path)
+    text = pdf_document.load_page(page_number).get_text()
+    numbers = {int(n) for n in QUESTION_NUMBER_PATTERN.findall(text)}
+    return {str(n) for n in numbers if 1 <= n <= 25}
+
+def get_expected_questions(pdf_path, page_number):
+    """Return the question numbers of a page if the text layer covers the whole page, else an empty set.
+
+    Numbers drawn as images or written without a separator are missed by the text layer, so
+    the numbers must be a run that starts at 1 or right after the previous page's last question,
+    and ends at 25 or right before the next page's first question.
+    """
+    numbers = sorted(int(q) for q in get_page_question_numbers(pdf_path, page_number))
+    if not numbers or numbers != list(range(numbers[0], numbers[-1] + 1)):
+        return set()
+
+    page_count = len(fitz.open(pdf_path))
+    previous_numbers = get_page_question_numbers(pdf_path, page_number - 1) if page_number > 0 else set()
+    next_numbers = get_page_question_numbers(pdf_path, page_number + 1) if page_number + 1 < page_count else set()
+    starts = numbers[0] == 1 or (previous_numbers and max(int(q) for q in previous_numbers) == numbers[0] - 1)
+    ends = numbers[-1] == 25 or (next_numbers and min(int(q) for q in next_numbers) == numbers[-1] + 1)
+    return {str(n) for n in numbers} if starts and ends else set()
+
+def covers_expected_questions(expected_questions, answers):
+    """True when the answers are exactly the expected questions and they form a run like 10-17.
+
+    The expected questions come from the PDF text layer, which can miss numbers, so a set
+    with gaps or answers outside of it means the text layer is not trusted.
+    """
+    if not expected_questions or set(answers) != expected_questions:
+        return False
+    numbers = sorted(int(q) for q in expected_questions)
+    return numbers == list(range(numbers[0], numbers[-1] + 1))
+
+def process_pdf_page_stream(pdf_path, page_number, on_answer=None, expected_questions=None):
+    """Stream the answers for a page, calling on_answer(question, answer) as each one arrives.
+
+    The stream is read until the usage chunk, unless every expected question has been
+    answered first, in which case it is closed early. The token counts are then unknown:
+    prompt_tokens is None and completion_tokens is estimated from the number of chunks.
+    Returns (result, prompt_tokens, completion_tokens, time_to_first_answer).
+    """
+    answers = {}
+    buffer = ""
+    prompt_tokens = 0
+    completion_tokens = 0
+    time_to_first_answer = None
+    finished = False  # The dictionary was closed or the model replied None
+    try:
+        if expected_questions is None:
+            expected_questions = get_expected_questions(pdf_path, page_number)
+        base64_image = get_pdf_page(pdf_path, page_number)
+        start_time = time.perf_counter()
+        stream = client.chat.completions.create(
+            model=MODEL,
+            messages=build_page_messages(base64_image),
+            max_tokens=300,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        try:
+            for chunk in stream:
+                if chunk.usage:
+                    prompt_tokens = chunk.usage.prompt_tokens
+                    completion_tokens = chunk.usage.completion_tokens
+                if finished or not chunk.choices or not chunk.choices[0].delta.content:
+                    continue
+                # Until the usage chunk arrives each content chunk is roughly one token
+                completion_tokens += 1
+                buffer += chunk.choices[0].delta.content
+
+                if buffer.strip().lower().startswith("none"):
+                    finished = True
+                    continue
+
+                matches = ANSWER_PATTERN.findall(buffer)
+                if "}" not in buffer:
+                    # The last answer has no delimiter yet; accept it only if it completes the page
+                    last = LAST_ANSWER_PATTERN.search(buffer)
+                    if last and covers_expected_questions(expected_questions, {**answers, last.group(1): None}):
+                        matches.append(last.groups())
+                for question_num, answer in matches:
+                    if question_num in answers:
+                        continue
+                    answers[question_num] = answer
+                    if time_to_first_answer is None:
+                        time_to_first_answer = time.perf_counter() - start_time
+                    if on_answer:
+                        on_answer(question_num, answers[question_num])
+
+                if "}" in buffer:
+                    finished = True
+                elif covers_expected_questions(expected_questions, answers):
+                    numbers = sorted(int(q) for q in answers)
+                    print(f"Closing stream for page {page_number + 1} early: questions {numbers[0]}-{numbers[-1]} "
+                          "from the PDF text are answered")
+                    prompt_tokens = None
+                    break
+        finally:
+            stream.close()
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        if not answers:
+            return None, prompt_tokens, completion_tokens, time_to_first_answer
+
+    if not answers:
+        return buffer.strip() or None, prompt_tokens, completion_tokens, time_to_first_answer
+    result = "{" + ", ".join(f"{q}: {a}" for q, a in answers.items()) + "}"
+    return result, prompt_tokens, completion_tokens, time_to_first_answer
     
 def clean_response_to_json(response):
     """Convert the GPT response to valid JSON."""
@@ -76,11 +196,31 @@ def clean_response_to_json(response):
         print(f"Original response: {response}")
         return None
     
+def add_answer(answers_dict, year, nivel_num, question_num, answer, width, height, page_number):
+    """Create or update the row of a question in the year answers."""
+    if question_num not in answers_dict:
+        answers_dict[question_num] = {
+            'question_number': str(question_num),
+            'nivel1': '',
+            'nivel2': '',
+            'nivel3': '',
+            'nivel4': '',
+            'fase': '2',  # Hardcoded as we're only processing fase 2
+            'anio': str(year),
+            'image_width': width,
+            'image_height': height,
+            'page_number': str(page_number + 1)  # Adding page number (1-indexed)
+        }
+    # Update the specific nivel's answer
+    answers_dict[question_num][f'nivel{nivel_num}'] = answer
+
 def get_year_answers(year):
     """Process all exams for a given year and create a combined answers file."""
     answers_dict = {}  # Dictionary to store answers by question number
     total_prompt_tokens = 0
     total_completion_tokens = 0
+    last_prompt_tokens = 0
+    estimated_pages = 0  # Streamed pages closed before their token usage was reported
     
     # Process each nivel
     for nivel in NIVELES:
@@ -102,33 +242,41 @@ def get_year_answers(year):
             width, height = pix.width, pix.height
             
             # Process page
-            result, prompt_tokens, completion_tokens = process_pdf_page(pdf_path, page_number)
+            if STREAM_ANSWERS:
+                # Answers are written as they arrive, so only the metrics are left to record
+                page_questions = []
+
+                def on_answer(question_num, answer):
+                    add_answer(answers_dict, year, nivel_num, question_num, answer, width, height, page_number)
+                    page_questions.append(question_num)
+
+                result, prompt_tokens, completion_tokens, time_to_first_answer = process_pdf_page_stream(
+                    pdf_path, page_number, on_answer=on_answer)
+                if prompt_tokens is None:
+                    # Closed early, before the usage chunk; every page sends the same prompt and image size
+                    prompt_tokens = last_prompt_tokens
+                    estimated_pages += 1
+                if time_to_first_answer is not None:
+                    for question_num in page_questions:
+                        answers_dict[question_num][f'time_to_first_answer_nivel{nivel_num}'] = f"{time_to_first_answer:.3f}"
+                    print(f"Page {page_number + 1} time to first answer: {time_to_first_answer:.3f}s")
+            else:
+                result, prompt_tokens, completion_tokens = process_pdf_page(pdf_path, page_number)
+            if prompt_tokens:
+                last_prompt_tokens = prompt_tokens
             total_prompt_tokens += prompt_tokens
             total_completion_tokens += completion_tokens
             
             print(f"Page {page_number + 1} result:", result)
 
             if result and result.lower() != "none":
-                page_answers = clean_response_to_json(result)
-                if page_answers:
-                    # Create or update answer rows
-                    for question_num, answer in page_answers.items():
-                        if question_num not in answers_dict:
-                            answers_dict[question_num] = {
-                                'question_number': str(question_num),
-                                'nivel1': '',
-                                'nivel2': '',
-                                'nivel3': '',
-                                'nivel4': '',
-                                'fase': '2',  # Hardcoded as we're only processing fase 2
-                                'anio': str(year),
-                                'image_width': width,
-                                'image_height': height,
-                                'page_number': str(page_number + 1)  # Adding page number (1-indexed)
-                            }
-                        # Update the specific nivel's answer
-                        answers_dict[question_num][f'nivel{nivel_num}'] = answer
+                if STREAM_ANSWERS:
+                    page_answers = page_questions
                 else:
+                    page_answers = clean_response_to_json(result)
+                    for question_num, answer in (page_answers or {}).items():
+                        add_answer(answers_dict, year, nivel_num, question_num, answer, width, height, page_number)
+                if not page_answers:
                     print(f"Failed to parse answers for {nivel} page {page_number}")
     
     if not answers_dict:
@@ -150,7 +298,9 @@ def get_year_answers(year):
     # Save all answers to CSV
     output_path = os.path.join(ANSWERS_DIR, f"respuestas_{year}.csv")
     fieldnames = ['question_number', 'nivel1', 'nivel2', 'nivel3', 'nivel4', 'fase', 'anio', 
-                 'image_width', 'image_height', 'page_number', 'prompt_tokens', 'completion_tokens']
+                 'image_width', 'image_height', 'page_number', 'prompt_tokens', 'completion_tokens',
+                 'time_to_first_answer_nivel1', 'time_to_first_answer_nivel2',
+                 'time_to_first_answer_nivel3', 'time_to_first_answer_nivel4']
     
     with open(output_path, 'w', newline='', encoding='utf-8') as f:
         writer = csv.DictWriter(f, fieldnames=fieldnames)
@@ -159,12 +309,14 @@ def get_year_answers(year):
     
     print(f"\nSuccessfully created {output_path}")
     print(f"Total tokens used - Prompt: {total_prompt_tokens}, Completion: {total_completion_tokens}")
+    if estimated_pages:
+        print(f"Token counts for {estimated_pages} pages closed early are estimates")
     return output_path
 
 def get_exam_answers(pdf_path):
     """Process a single exam PDF and create its answers file."""
     # Extract year and nivel from path
-    match = re.search(r'\\(\d{4})\\nivel(\d)_fase(\d)', pdf_path)
+    match = re.search(r'[\\/](\d{4})[\\/]nivel(\d)_fase(\d)', pdf_path)
     if not match:
         print(f"Error: Could not extract year and level from path: {pdf_path}")
         return
@@ -236,7 +388,9 @@ def merge_answers():
     """Merge all year answer CSV files into a single CSV file."""
     all_answers = []
     fieldnames = ['question_number', 'nivel1', 'nivel2', 'nivel3', 'nivel4', 'fase', 'anio', 
-                 'image_width', 'image_height', 'page_number', 'prompt_tokens', 'completion_tokens']
+                 'image_width', 'image_height', 'page_number', 'prompt_tokens', 'completion_tokens',
+                 'time_to_first_answer_nivel1', 'time_to_first_answer_nivel2',
+                 'time_to_first_answer_nivel3', 'time_to_first_answer_nivel4']
     
     # Iterate through all CSV files in the answers directory
     for year in range(2002, CURR_YEAR):
@@ -10,7 +10,7 @@ pdf_path = r"soluciones\2022\soluciones_fase2.pdf"
 def get_solutions_csv(pdf_path):
     try:
         # Extract year from pdf path using regex
-        year_match = re.search(r'\\(\d{4})\\', pdf_path)
+        year_match = re.search(r'[\\/](\d{4})[\\/]', pdf_path)
         if not year_match:
             print(f"Warning: Could not extract year from pdf path: {pdf_path}")
             return None
@@ -0,0 +1,91 @@
+import os
+os.environ.setdefault("OPENAI_API_KEY", "test")  # The OpenAI client is created on import
+
+import fitz
+import pytest
+from src import exam_solver
+from benchmarks.run_benchmarks import FakeModelBackend
+
+PAGE = {"10": "B", "11": "B", "12": "C"}
+PROMPT_TOKENS = 1105  # Reported by FakeModelBackend in the usage chunk
+
+
+def write_exam(path, pages):
+    """Write a PDF whose pages list the given question numbers as '<n>. ...' in the text layer."""
+    doc = fitz.open()
+    for numbers in pages:
+        page = doc.new_page()
+        for i, n in enumerate(numbers):
+            page.insert_text((50, 50 + 20 * i), f"{n}. ¿Cuántos triángulos hay en la figura?")
+    doc.save(str(path))
+    return str(path)
+
+
+@pytest.fixture
+def stream_page(monkeypatch):
+    """Stream content one character per chunk and return (answers received, process_pdf_page_stream result)."""
+    def run(content, pdf_path="exam.pdf", page_number=0, expected_questions=None):
+        monkeypatch.setattr(exam_solver, "client", FakeModelBackend([content], chunk_size=1))
+        monkeypatch.setattr(exam_solver, "get_pdf_page", lambda path, page: "")
+        received = {}
+        result = exam_solver.process_pdf_page_stream(
+            pdf_path, page_number, on_answer=received.__setitem__, expected_questions=expected_questions)
+        return received, result
+    return run
+
+
+def test_answers_split_across_chunks(stream_page):
+    received, (result, prompt_tokens, completion_tokens, time_to_first_answer) = stream_page(
+        "{10: B, 11: B, 12: C}", expected_questions=set())
+    assert received == PAGE
+    assert result == "{10: B, 11: B, 12: C}"
+    assert prompt_tokens == PROMPT_TOKENS
+    assert completion_tokens > 0
+    assert time_to_first_answer is not None
+
+
+def test_none_reply_reads_usage(stream_page):
+    received, (result, prompt_tokens, _, time_to_first_answer) = stream_page("None", expected_questions=set())
+    assert received == {}
+    assert result == "None"
+    assert prompt_tokens == PROMPT_TOKENS
+    assert time_to_first_answer is None
+
+
+def test_closes_early_once_expected_questions_are_answered(stream_page):
+    received, (_, prompt_tokens, completion_tokens, _) = stream_page(
+        "{10: B, 11: B, 12: C, 13: D}", expected_questions=set(PAGE))
+    assert received == PAGE
+    assert prompt_tokens is None  # The usage chunk never arrives
+    assert completion_tokens > 0
+
+
+def test_gap_in_expected_questions_reads_to_end(stream_page):
+    received, (_, prompt_tokens, _, _) = stream_page("{10: B, 11: B, 12: C}", expected_questions={"10", "12"})
+    assert received == PAGE
+    assert prompt_tokens == PROMPT_TOKENS
+
+
+def test_keeps_answer_case(stream_page):
+    received, (result, _, _, _) = stream_page("{10: b}", expected_questions=set())
+    assert received == {"10": "b"}
+    assert exam_solver.clean_response_to_json(result) == {"10": "b"}
+
+
+@pytest.mark.parametrize("pages, expected", [
+    ([list(range(1, 10)), list(range(10, 19))], {str(n) for n in range(1, 10)}),
+    ([list(range(1, 10)), list(range(11, 19))], set()),  # Question 10 is missing from the text layer
+    ([list(range(1, 10))], set()),  # Last page does not end at 25
+    ([list(range(1, 5)) + list(range(6, 10)), list(range(10, 19))], set()),  # Gap inside the page
+])
+def test_expected_questions_must_cover_the_page(tmp_path, pages, expected):
+    pdf_path = write_exam(tmp_path / "exam.pdf", pages)
+    assert exam_solver.get_expected_questions(pdf_path, 0) == expected
+
+
+def test_number_missing_from_text_layer_is_not_dropped(tmp_path, stream_page):
+    pdf_path = write_exam(tmp_path / "exam.pdf", [list(range(1, 10)), list(range(11, 19))])
+    content = "{" + ", ".join(f"{n}: {'ABCDE'[n % 5]}" for n in range(1, 11)) + "}"
+    received, (_, prompt_tokens, _, _) = stream_page(content, pdf_path=pdf_path)
+    assert set(received) == {str(n) for n in range(1, 11)}
+    assert prompt_tokens == PROMPT_TOKENS